@@ -1,9 +1,32 @@
-import requests
+import aiohttp
+import asyncio
 import sqlite3
 import os
 import datetime
+import math
 
 DB_NAME = "facts.db"
+CAT_FACT_URL = "https://catfact.ninja/fact"
+DOG_FACT_URL = "https://dogapi.dog/api/v2/facts"
+DOG_FACTS_PER_REQUEST = 5
+MAX_CONNECTIONS_PER_HOST = 10  # Size of the keep-alive connection pool for each API.
+
+def _connect():
+    """
+    Opens a connection to the SQLite database configured for faster writes.
+    
+    WAL journaling with NORMAL synchronous mode avoids a full fsync on every commit,
+    and temporary structures and a ~20MB page cache are kept in memory.
+    
+    Returns:
+        sqlite3.Connection: The configured database connection.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    return conn
 
 def create_tables():
     """
@@ -14,7 +37,7 @@ def create_tables():
       - CatFactMetadata: stores metadata for each cat fact (fact_length and insertion_time).
       - DogFacts: stores dog fact text.
     """
-    conn = sqlite3.connect(DB_NAME)
+    conn = _connect()
     cur = conn.cursor()
     
     # Create table for cat facts with fact text as UNIQUE.
@@ -46,88 +69,135 @@ def create_tables():
     conn.commit()
     conn.close()
 
-def fetch_cat_facts(n=10):
+def _find_existing_facts(conn, table, texts):
+    """
+    Looks up which of the given fact texts are already stored in a table.
+    
+    The lookup is answered by the index backing the table's UNIQUE fact column,
+    so only the candidate texts are read rather than every stored fact.
+    
+    Args:
+        conn (sqlite3.Connection): Open database connection.
+        table (str): Name of the facts table (CatFacts or DogFacts).
+        texts (collection of str): Candidate fact texts.
+    
+    Returns:
+        set of str: The subset of texts already present in the table.
+    """
+    if not texts:
+        return set()
+    placeholders = ", ".join("?" for _ in texts)
+    cur = conn.execute(f"SELECT fact FROM {table} WHERE fact IN ({placeholders})", list(texts))
+    return {fact for (fact,) in cur}
+
+async def _fetch_one(session, url, params=None):
+    """
+    Issues a single GET request on the shared session and returns the decoded JSON body.
+    
+    Raises:
+        aiohttp.ClientResponseError: If the response status is not successful.
+    """
+    async with session.get(url, params=params) as response:
+        response.raise_for_status()
+        return await response.json()
+
+async def fetch_cat_facts(session, n=10):
     """
     Fetches n new random cat facts using the /fact endpoint. 
-    Each fact is checked to ensure it does not already exist in the database or in the current batch.
-    If a duplicate is encountered, a replacement fact is fetched.
+    Requests for the outstanding facts are issued concurrently; each fact is checked to ensure
+    it does not already exist in the database or in the current batch, and only the shortfall
+    left by duplicates or errors is requested again.
+    
+    Args:
+        session (aiohttp.ClientSession): Shared HTTP session.
+        n (int): Number of new facts to fetch.
     
     Returns:
         list of dict: List of cat fact objects in the format {'fact': fact_text}
     """
-    # Get existing cat facts from the database.
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("SELECT fact FROM CatFacts")
-    existing_facts = set(row[0] for row in cur.fetchall())
-    conn.close()
-    
+    conn = _connect()
     new_facts = set()
+    stored_facts = set()  # Facts seen this run that the database already holds.
     attempts = 0
     max_attempts = n * 20  # Safety cap in case of many duplicates.
     
     while len(new_facts) < n and attempts < max_attempts:
-        try:
-            response = requests.get("https://catfact.ninja/fact")
-            if response.status_code != 200:
-                print(f"Error: Received status code {response.status_code} for cat fact")
-                attempts += 1
+        batch_size = min(n - len(new_facts), max_attempts - attempts)
+        tasks = [_fetch_one(session, CAT_FACT_URL) for _ in range(batch_size)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        attempts += batch_size
+        
+        candidates = set()
+        for data in results:
+            if isinstance(data, Exception):
+                print("Error fetching cat fact:", data)
                 continue
-            
-            data = response.json()
-            fact_text = data.get("fact")
-            if fact_text and fact_text not in existing_facts and fact_text not in new_facts:
-                new_facts.add(fact_text)
-            # If the fact is a duplicate, simply try again.
-        except Exception as e:
-            print("Error fetching cat fact:", e)
-        attempts += 1
+            try:
+                fact_text = data.get("fact")
+                if fact_text and fact_text not in new_facts and fact_text not in stored_facts:
+                    candidates.add(fact_text)
+            except (AttributeError, TypeError) as e:
+                # The response body was not shaped like a cat fact; the shortfall is retried.
+                print("Error fetching cat fact:", e)
+        
+        # Facts already in the database are dropped; the next round only requests the shortfall.
+        existing = _find_existing_facts(conn, "CatFacts", candidates)
+        stored_facts |= existing
+        new_facts |= candidates - existing
+    conn.close()
     
     if len(new_facts) < n:
         print(f"Warning: Only obtained {len(new_facts)} new cat facts after {attempts} attempts")
     
     return [{"fact": fact} for fact in new_facts]
 
-def fetch_dog_facts(n=10):
+async def fetch_dog_facts(session, n=10):
     """
     Fetches n unique dog facts from the Dog API by kinduff in increments of 5 per request.
-    Each fact is checked against existing facts in the database and within the current batch.
-    If a duplicate is encountered, a replacement fact is fetched.
+    Enough requests to cover the outstanding facts are issued concurrently; each fact is checked
+    against existing facts in the database and within the current batch, and only the shortfall
+    left by duplicates or errors is requested again.
+    
+    Args:
+        session (aiohttp.ClientSession): Shared HTTP session.
+        n (int): Number of unique facts to fetch.
     
     Returns:
         list of str: List of unique dog fact strings.
     """
-    # Get existing dog facts from the database.
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("SELECT fact FROM DogFacts")
-    existing_facts = set(row[0] for row in cur.fetchall())
-    conn.close()
-    
+    conn = _connect()
     unique_facts = set()
+    stored_facts = set()  # Facts seen this run that the database already holds.
     attempts = 0
     max_attempts = n * 20  # Safety cap in case of many duplicates.
+    params = {"limit": DOG_FACTS_PER_REQUEST}
     
     while len(unique_facts) < n and attempts < max_attempts:
-        try:
-            url = "https://dogapi.dog/api/v2/facts"
-            params = {"limit": 5}
-            response = requests.get(url, params=params)
-            if response.status_code != 200:
-                print(f"Error: Received status code {response.status_code} for dog facts")
-                attempts += 1
+        shortfall = n - len(unique_facts)
+        batch_size = min(math.ceil(shortfall / DOG_FACTS_PER_REQUEST), max_attempts - attempts)
+        tasks = [_fetch_one(session, DOG_FACT_URL, params=params) for _ in range(batch_size)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        attempts += batch_size
+        
+        candidates = set()
+        for data in results:
+            if isinstance(data, Exception):
+                print("Error fetching dog facts:", data)
                 continue
-            
-            data = response.json()
-            facts_list = data.get("data", [])
-            for fact in facts_list:
-                text = fact.get("attributes", {}).get("body")
-                if text and text not in existing_facts and text not in unique_facts:
-                    unique_facts.add(text)
-            # If any facts are duplicates, they are simply ignored and we fetch another batch.
-        except Exception as e:
-            print("Error fetching dog facts:", e)
-        attempts += 1
+            try:
+                for fact in data.get("data", []):
+                    text = fact.get("attributes", {}).get("body")
+                    if text and text not in unique_facts and text not in stored_facts:
+                        candidates.add(text)
+            except (AttributeError, TypeError) as e:
+                # The response body was not shaped like a list of dog facts; the shortfall is retried.
+                print("Error fetching dog facts:", e)
+        
+        # Facts already in the database are dropped; the next round only requests the shortfall.
+        existing = _find_existing_facts(conn, "DogFacts", candidates)
+        stored_facts |= existing
+        unique_facts |= candidates - existing
+    conn.close()
     
     if len(unique_facts) < n:
         print(f"Warning: Only obtained {len(unique_facts)} unique dog facts after {attempts} attempts")
@@ -137,69 +207,73 @@ def fetch_dog_facts(n=10):
 def store_cat_facts(facts):
     """
     Inserts cat facts into the CatFacts table and corresponding metadata into CatFactMetadata.
+    All rows are written in a single transaction; facts already in the table are skipped.
     
     Args:
         facts (list of dict): List of cat fact objects.
     """
-    conn = sqlite3.connect(DB_NAME)
+    texts = [text for fact in facts if (text := fact.get("fact")) is not None]
+    if not texts:
+        return
+    
+    conn = _connect()
     cur = conn.cursor()
     
-    for fact in facts:
-        text = fact.get("fact")
-        if text is None:
-            continue
-        try:
-            cur.execute("INSERT INTO CatFacts (fact) VALUES (?)", (text,))
-            new_id = cur.lastrowid
-            # Calculate metadata.
-            fact_length = len(text)
-            insertion_time = datetime.datetime.now().isoformat()
-            cur.execute(
-                "INSERT INTO CatFactMetadata (cat_fact_id, fact_length, insertion_time) VALUES (?, ?, ?)", 
-                (new_id, fact_length, insertion_time)
-            )
-            conn.commit()
-        except sqlite3.IntegrityError:
-            # Fact already exists; skip duplicate.
-            continue
+    cur.executemany("INSERT OR IGNORE INTO CatFacts (fact) VALUES (?)", [(text,) for text in texts])
+    
+    # Recover the ids of the stored facts so metadata can be attached to them.
+    placeholders = ", ".join("?" for _ in texts)
+    cur.execute(f"SELECT id, fact FROM CatFacts WHERE fact IN ({placeholders})", texts)
+    insertion_time = datetime.datetime.now().isoformat()
+    metadata_rows = [(fact_id, len(text), insertion_time) for fact_id, text in cur.fetchall()]
+    
+    # Facts that already existed keep their original metadata.
+    cur.executemany(
+        "INSERT OR IGNORE INTO CatFactMetadata (cat_fact_id, fact_length, insertion_time) VALUES (?, ?, ?)",
+        metadata_rows
+    )
+    conn.commit()
     conn.close()
 
 def store_dog_facts(facts):
     """
     Inserts dog facts into the DogFacts table.
+    All rows are written in a single transaction; facts already in the table are skipped.
     
     Args:
         facts (list of str): List of dog fact strings.
     """
-    conn = sqlite3.connect(DB_NAME)
+    conn = _connect()
     cur = conn.cursor()
     
-    for fact in facts:
-        if fact is None:
-            continue
-        try:
-            cur.execute("INSERT INTO DogFacts (fact) VALUES (?)", (fact,))
-            conn.commit()
-        except sqlite3.IntegrityError:
-            # Fact already exists; skip duplicate.
-            continue
+    cur.executemany(
+        "INSERT OR IGNORE INTO DogFacts (fact) VALUES (?)",
+        [(fact,) for fact in facts if fact is not None]
+    )
+    conn.commit()
     conn.close()
 
-def main():
+async def main():
     """
     Main function to create tables and fetch/store 10 new cat facts and 10 new dog facts.
+    A single HTTP session is shared by all requests made during the run, so connections
+    (and their TLS handshakes) are pooled and reused across requests and retry rounds.
     """
     create_tables()
     
-    # Fetch and store 10 new cat facts using the /fact endpoint.
-    cat_facts = fetch_cat_facts(n=10)
-    store_cat_facts(cat_facts)
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONNECTIONS_PER_HOST)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # Fetch 10 new cat facts and 10 unique dog facts; the two APIs are independent,
+        # so both fetches run concurrently.
+        cat_facts, dog_facts = await asyncio.gather(
+            fetch_cat_facts(session, n=10),
+            fetch_dog_facts(session, n=10)
+        )
     
-    # Fetch and store 10 unique dog facts.
-    dog_facts = fetch_dog_facts(n=10)
+    store_cat_facts(cat_facts)
     store_dog_facts(dog_facts)
     
     print("Data gathering complete. New facts (if any) have been stored in the database.")
 
 if __name__ == '__main__':
-    main()
+    asyncio.run(main())
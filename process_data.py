@@ -1,16 +1,124 @@
+import atexit
+import heapq
+import itertools
+import re
 import sqlite3
-import string
 import csv
-import matplotlib.pyplot as plt
+import unicodedata
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 import nltk
 from nltk.corpus import stopwords
 
-# Download stopwords if not already present.
-nltk.download('stopwords')
-
 DB_NAME = "facts.db"
 
+# The stopwords and the database connection are created on first use rather than at
+# import, so processes that import this module without needing them (such as the chart
+# rendering workers in main) do not load NLTK data or open facts.db.
+_STOPWORDS = None
+_CONN = None
+
+def _get_stopwords():
+    """
+    Returns the NLTK English stopwords, loading them once on first use and downloading
+    the corpus only if it is not already present.
+    
+    Returns:
+        frozenset of str: The English stopwords.
+    """
+    global _STOPWORDS
+    if _STOPWORDS is None:
+        try:
+            _STOPWORDS = frozenset(stopwords.words('english'))
+        except LookupError:
+            nltk.download('stopwords', quiet=True)
+            _STOPWORDS = frozenset(stopwords.words('english'))
+    return _STOPWORDS
+
+def _combining_marks():
+    """
+    Builds the body of a regex character class matching every Unicode combining mark
+    (categories Mn, Mc and Me).
+    
+    Python's \\w does not match combining marks, so without them a decomposed "café" or
+    Devanagari "हिन्दी" would be split apart. Combining marks only occur below U+20000
+    and in the variation selector supplement, so only those code points are scanned.
+    
+    Returns:
+        str: The marks as escaped "a-b" ranges, ready to be placed inside [...].
+    """
+    code_points = itertools.chain(range(0x20000), range(0xE0000, 0xE1000))
+    ranges = []
+    for c in code_points:
+        if unicodedata.category(chr(c))[0] != "M":
+            continue
+        if ranges and ranges[-1][1] == c - 1:
+            ranges[-1][1] = c
+        else:
+            ranges.append([c, c])
+    # Consecutive marks are collapsed into ranges, which the regex engine matches far faster.
+    return "".join(f"{re.escape(chr(start))}-{re.escape(chr(end))}" for start, end in ranges)
+
+# A word starts with a Unicode letter or digit, continues with letters, digits and
+# combining marks, and may contain apostrophes only inside it (as in "cat's").
+_WORD_CHARS = rf"[^\W_](?:[^\W_]|[{_combining_marks()}])*"
+_WORD_RE = re.compile(rf"{_WORD_CHARS}(?:'{_WORD_CHARS})*")
+
+def _tokenize(text):
+    """
+    Lowercases and NFC-normalizes the text and splits it into words, without removing stopwords.
+    
+    Args:
+        text (str): The text to tokenize.
+    
+    Returns:
+        list of str: List of words in the order they appear.
+    """
+    return _WORD_RE.findall(unicodedata.normalize("NFC", text.lower()))
+
+def _connect():
+    """
+    Opens a connection to the SQLite database configured for read-heavy processing,
+    keeping temporary structures and a ~20MB page cache in memory.
+    
+    Returns:
+        sqlite3.Connection: The configured database connection.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    return conn
+
+def _get_connection():
+    """
+    Returns the connection shared by every query in this module, so the page cache
+    stays warm. It is opened on first use and closed at interpreter exit.
+    
+    Returns:
+        sqlite3.Connection: The shared database connection.
+    """
+    global _CONN
+    if _CONN is None:
+        _CONN = _connect()
+        atexit.register(_CONN.close)
+    return _CONN
+
+def _fetch_column(query):
+    """
+    Runs a single-column query and returns its values as a flat list.
+    
+    Rows are unpacked while iterating the cursor, which skips the intermediate
+    list of row tuples that fetchall() would build.
+    
+    Args:
+        query (str): A SELECT returning one column.
+    
+    Returns:
+        list: The column values.
+    """
+    return [value for (value,) in _get_connection().execute(query)]
+
 def join_cat_facts_and_metadata():
     """
     Performs a JOIN query between CatFacts and CatFactMetadata.
@@ -18,17 +126,27 @@ def join_cat_facts_and_metadata():
     Returns:
         list of tuples: Each tuple contains (fact, fact_length, insertion_time)
     """
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
     query = '''
         SELECT CatFacts.fact, CatFactMetadata.fact_length, CatFactMetadata.insertion_time
         FROM CatFacts
         JOIN CatFactMetadata ON CatFacts.id = CatFactMetadata.cat_fact_id
     '''
-    cur.execute(query)
-    results = cur.fetchall()
-    conn.close()
-    return results
+    return _get_connection().execute(query).fetchall()
+
+def average_cat_fact_length():
+    """
+    Calculates the average cat fact length in SQLite over the JOIN of CatFacts and
+    CatFactMetadata, without loading the fact texts into Python.
+    
+    Returns:
+        float: Average fact length, or 0 if there are no cat facts.
+    """
+    query = '''
+        SELECT AVG(CatFactMetadata.fact_length)
+        FROM CatFacts
+        JOIN CatFactMetadata ON CatFacts.id = CatFactMetadata.cat_fact_id
+    '''
+    return _get_connection().execute(query).fetchone()[0] or 0
 
 def get_all_cat_facts():
     """
@@ -37,12 +155,7 @@ def get_all_cat_facts():
     Returns:
         list of str: List of cat fact texts.
     """
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("SELECT fact FROM CatFacts")
-    results = [row[0] for row in cur.fetchall()]
-    conn.close()
-    return results
+    return _fetch_column("SELECT fact FROM CatFacts")
 
 def get_all_dog_facts():
     """
@@ -51,17 +164,13 @@ def get_all_dog_facts():
     Returns:
         list of str: List of dog fact texts.
     """
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("SELECT fact FROM DogFacts")
-    results = [row[0] for row in cur.fetchall()]
-    conn.close()
-    return results
+    return _fetch_column("SELECT fact FROM DogFacts")
 
 def clean_and_tokenize(text):
     """
-    Lowercases the text, removes punctuation, splits it into words,
-    and removes stopwords using the NLTK English stopwords list.
+    Lowercases and NFC-normalizes the text, extracts its words (runs of Unicode letters,
+    digits and combining marks, keeping inner apostrophes as in "cat's") in a single
+    regex pass, and removes stopwords using the NLTK English stopwords list.
     
     Args:
         text (str): The text to clean and tokenize.
@@ -69,14 +178,8 @@ def clean_and_tokenize(text):
     Returns:
         list of str: List of words with stopwords removed.
     """
-    text = text.lower()
-    translator = str.maketrans('', '', string.punctuation)
-    text = text.translate(translator)
-    words = text.split()
-    
-    stop_words = set(stopwords.words('english'))
-    filtered_words = [word for word in words if word not in stop_words]
-    return filtered_words
+    stop_words = _get_stopwords()
+    return [word for word in _tokenize(text) if word not in stop_words]
 
 def calculate_word_frequencies(facts):
     """
@@ -88,35 +191,84 @@ def calculate_word_frequencies(facts):
     Returns:
         Counter: A Counter object with word frequencies.
     """
-    all_words = []
+    word_counts = Counter()
     for fact in facts:
-        words = clean_and_tokenize(fact)
-        all_words.extend(words)
-    return Counter(all_words)
+        word_counts.update(clean_and_tokenize(fact))
+    return word_counts
+
+def calculate_word_frequencies_in_db(table):
+    """
+    Calculates the frequency distribution of words in a facts table inside SQLite.
+    
+    The facts are indexed into a temporary FTS5 table and token counts are read from
+    its fts5vocab view, so the facts are never tokenized in Python; only the (much
+    smaller) vocabulary is re-tokenized and filtered against the stopwords, giving the
+    same counts as calculate_word_frequencies. Falls back to calculate_word_frequencies
+    if this SQLite build lacks FTS5.
+    
+    Args:
+        table (str): Name of the facts table (CatFacts or DogFacts).
+    
+    Returns:
+        Counter: A Counter object with word frequencies.
+    """
+    conn = _get_connection()
+    fts_table = f"{table}_fts"
+    vocab_table = f"{table}_vocab"
+    try:
+        # Letters, digits, combining marks and apostrophes are all token characters, so no
+        # word clean_and_tokenize would produce is split across FTS5 terms; diacritics are
+        # kept (e.g. "café", not "cafe").
+        conn.execute(
+            f"CREATE VIRTUAL TABLE temp.{fts_table} USING fts5("
+            f"fact, tokenize=\"unicode61 remove_diacritics 0 categories 'L* N* Co M*' tokenchars ''''\")"
+        )
+    except sqlite3.OperationalError as e:
+        if "no such module: fts5" not in str(e):
+            raise
+        return calculate_word_frequencies(_fetch_column(f"SELECT fact FROM {table}"))
+    
+    try:
+        conn.execute(f"CREATE VIRTUAL TABLE temp.{vocab_table} USING fts5vocab(temp, {fts_table}, row)")
+        conn.execute(f"INSERT INTO temp.{fts_table} (fact) SELECT fact FROM {table}")
+        
+        stop_words = _get_stopwords()
+        word_counts = Counter()
+        for term, count in conn.execute(f"SELECT term, cnt FROM temp.{vocab_table}"):
+            # Each term goes through the same tokenizer as clean_and_tokenize, which lowercases
+            # and NFC-normalizes it, drops quote marks around it ("'cats'", "cats'") and splits
+            # terms such as "x''y" that are not a single word in Python.
+            for word in _tokenize(term):
+                if word not in stop_words:
+                    word_counts[word] += count
+    finally:
+        conn.execute(f"DROP TABLE IF EXISTS temp.{vocab_table}")
+        conn.execute(f"DROP TABLE IF EXISTS temp.{fts_table}")
+        # The INSERT above implicitly opened a transaction; end it so facts.db is not left locked.
+        conn.commit()
+    return word_counts
 
-def write_word_frequency_csv(freq_cat, freq_dog, combined_freq, filename="word_frequency.csv"):
+def write_word_frequency_csv(freq_cat, freq_dog, filename="word_frequency.csv"):
     """
     Writes word frequency data to a CSV file.
     
-    The CSV contains columns: word, freq_cat, freq_dog, freq_combined.
+    The CSV contains columns: word, freq_cat, freq_dog, freq_combined, with one row
+    per word in alphabetical order. The combined frequency is the sum of the cat and
+    dog frequencies, computed per row.
     
     Args:
         freq_cat (Counter): Word frequencies for cat facts.
         freq_dog (Counter): Word frequencies for dog facts.
-        combined_freq (Counter): Combined word frequencies.
         filename (str): Name of the output CSV file.
     """
-    words = set(freq_cat.keys()) | set(freq_dog.keys())
+    words = sorted(freq_cat.keys() | freq_dog.keys())
     with open(filename, "w", newline="") as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(["word", "freq_cat", "freq_dog", "freq_combined"])
-        for word in words:
-            writer.writerow([
-                word,
-                freq_cat.get(word, 0),
-                freq_dog.get(word, 0),
-                combined_freq.get(word, 0)
-            ])
+        writer.writerows(
+            [word, cat := freq_cat.get(word, 0), dog := freq_dog.get(word, 0), cat + dog]
+            for word in words
+        )
     print(f"Word frequency data written to {filename}")
 
 def visualize_top_words(freq, title, filename):
@@ -124,11 +276,17 @@ def visualize_top_words(freq, title, filename):
     Creates a bar chart for the top 20 most frequent words.
     
     Args:
-        freq (Counter): Word frequency Counter.
+        freq (Counter or dict): Word frequency mapping.
         title (str): Title for the chart.
         filename (str): Name of the output image file.
     """
-    top_words = freq.most_common(20)
+    # matplotlib is imported here so runs that never plot do not pay its import cost.
+    # The non-interactive Agg backend only renders to files and needs no display.
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    
+    top_words = heapq.nlargest(20, freq.items(), key=itemgetter(1))
     words, counts = zip(*top_words)
     
     plt.figure(figsize=(10,6))
@@ -161,28 +319,28 @@ def main():
     """
     Main function to process the stored data:
       - Performs a JOIN on CatFacts and CatFactMetadata to calculate average fact length.
-      - Retrieves cat and dog fact texts.
       - Computes word frequency distributions for cat facts, dog facts, and the combined set.
       - Writes the calculated frequencies to a CSV file.
-      - Creates three visualizations (bar charts) for the top 20 words.
+      - Creates three visualizations (bar charts) for the top 20 words in parallel processes.
     """
-    joined_data = join_cat_facts_and_metadata()
-    if joined_data:
-        avg_length = calculate_average_fact_length(joined_data)
+    avg_length = average_cat_fact_length()
+    if avg_length:
         print(f"Average cat fact length: {avg_length:.2f} characters")
     
-    cat_facts = get_all_cat_facts()
-    dog_facts = get_all_dog_facts()
-    
-    freq_cat = calculate_word_frequencies(cat_facts)
-    freq_dog = calculate_word_frequencies(dog_facts)
-    combined_freq = freq_cat + freq_dog
+    freq_cat = calculate_word_frequencies_in_db("CatFacts")
+    freq_dog = calculate_word_frequencies_in_db("DogFacts")
     
-    write_word_frequency_csv(freq_cat, freq_dog, combined_freq)
+    write_word_frequency_csv(freq_cat, freq_dog)
     
-    visualize_top_words(freq_cat, "Top 20 Words in Cat Facts", "cat_facts_top20.png")
-    visualize_top_words(freq_dog, "Top 20 Words in Dog Facts", "dog_facts_top20.png")
-    visualize_top_words(combined_freq, "Top 20 Words in Combined Facts", "combined_facts_top20.png")
+    charts = [
+        (freq_cat, "Top 20 Words in Cat Facts", "cat_facts_top20.png"),
+        (freq_dog, "Top 20 Words in Dog Facts", "dog_facts_top20.png"),
+        (freq_cat + freq_dog, "Top 20 Words in Combined Facts", "combined_facts_top20.png"),
+    ]
+    # Rendering is CPU-bound and matplotlib is not thread-safe, so each chart gets its own process.
+    with ProcessPoolExecutor(max_workers=len(charts)) as executor:
+        # Consuming the results re-raises any error from a worker.
+        list(executor.map(visualize_top_words, *zip(*charts)))
 
 if __name__ == '__main__':
     main()
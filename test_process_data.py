@@ -0,0 +1,90 @@
+import sqlite3
+import unicodedata
+import unittest
+
+import process_data
+
+
+class CleanAndTokenizeTests(unittest.TestCase):
+    """
+    Checks clean_and_tokenize on text that a naive ASCII or \\w-only tokenizer splits apart.
+    """
+
+    def setUp(self):
+        # A fixed stopword list keeps these tests independent of the NLTK corpus.
+        self._saved_stopwords = process_data._STOPWORDS
+        process_data._STOPWORDS = frozenset(["the", "a", "don't"])
+
+    def tearDown(self):
+        process_data._STOPWORDS = self._saved_stopwords
+
+    def test_composed_and_decomposed_accents_give_the_same_words(self):
+        composed = "Café naïve Zürich señor"
+        decomposed = unicodedata.normalize("NFD", composed)
+        expected = ["café", "naïve", "zürich", "señor"]
+        self.assertEqual(process_data.clean_and_tokenize(composed), expected)
+        self.assertEqual(process_data.clean_and_tokenize(decomposed), expected)
+
+    def test_words_with_spacing_combining_marks_stay_whole(self):
+        self.assertEqual(process_data.clean_and_tokenize("हिन्दी भाषा"), ["हिन्दी", "भाषा"])
+
+    def test_apostrophes_are_only_kept_inside_words(self):
+        self.assertEqual(
+            process_data.clean_and_tokenize("The cat's 'quoted' cats' don't"),
+            ["cat's", "quoted", "cats"]
+        )
+
+    def test_punctuation_and_underscores_separate_words(self):
+        self.assertEqual(
+            process_data.clean_and_tokenize("well-known snake_case 10,000"),
+            ["well", "known", "snake", "case", "10", "000"]
+        )
+
+
+class WordFrequencyParityTests(unittest.TestCase):
+    """
+    Checks that the FTS5 word counts used by main match the Python tokenizer's counts,
+    so a change to either tokenizer cannot silently make them diverge.
+    """
+
+    EDGE_CASE_FACTS = [
+        "Café naïve Zürich señor",
+        unicodedata.normalize("NFD", "Café naïve, the decomposed way"),
+        "हिन्दी भाषा and हिन्दी again",
+        "İstanbul cats and ISTANBUL cats",
+        "A cat's whiskers; cats' paws; 'quoted' words; don't",
+        "cat''s x''y '' it''s",
+        "well-known snake_case 10,000 1.5kg ½ ²",
+        "Ελληνικά ΓΑΤΑ γάτα",
+    ]
+
+    def setUp(self):
+        self._saved_stopwords = process_data._STOPWORDS
+        self._saved_conn = process_data._CONN
+        process_data._STOPWORDS = frozenset(["the", "a", "and", "don't"])
+        process_data._CONN = sqlite3.connect(":memory:")
+        process_data._CONN.execute("CREATE TABLE EdgeFacts (fact TEXT)")
+        process_data._CONN.executemany(
+            "INSERT INTO EdgeFacts (fact) VALUES (?)", [(fact,) for fact in self.EDGE_CASE_FACTS]
+        )
+
+    def tearDown(self):
+        process_data._CONN.close()
+        process_data._CONN = self._saved_conn
+        process_data._STOPWORDS = self._saved_stopwords
+
+    def test_fts5_and_python_counts_match(self):
+        self.assertEqual(
+            process_data.calculate_word_frequencies_in_db("EdgeFacts"),
+            process_data.calculate_word_frequencies(self.EDGE_CASE_FACTS)
+        )
+
+    def test_fts5_leaves_no_open_transaction_or_temp_tables(self):
+        process_data.calculate_word_frequencies_in_db("EdgeFacts")
+        self.assertFalse(process_data._CONN.in_transaction)
+        temp_tables = process_data._CONN.execute("SELECT name FROM sqlite_temp_master").fetchall()
+        self.assertEqual(temp_tables, [])
+
+
+if __name__ == '__main__':
+    unittest.main()